@@ -12,9 +12,27 @@ Meeting EITHER test = SC met.
 import json
 import time
 import sys
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+import unicodedata
 from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession, NEVER_EXPIRE
+from urllib3.util.retry import Retry
+
+try:  # orjson handles the multi-MB leaguedash payloads several times faster
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dump_bytes(obj):
+        """Serialize to pretty-printed UTF-8 bytes in one buffer."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    json_loads = json.loads
+
+    def json_dump_bytes(obj):
+        return json.dumps(obj, indent=2).encode()
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -22,33 +40,99 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-def fetch_nba_stats(season: str) -> list[dict]:
+
+def _new_session() -> CachedSession:
+    """Build the shared keep-alive session: pooled connections, retries, cache.
+
+    Responses are cached on disk keyed by URL+params: 12h TTL for in-season
+    data, forever for completed seasons. Repeat runs make ~0 network requests.
+    """
+    s = CachedSession("nba_cache.sqlite", expire_after=43200, allowable_methods=["GET"])
+    s.headers.update(HEADERS)
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                    max_retries=Retry(total=3, backoff_factor=3)))
+    return s
+
+
+SESSION = _new_session()
+
+
+def clear_session():
+    """Drop and rebuild the shared session.
+
+    stats.nba.com sometimes wedges a kept-alive socket mid-run; closing the
+    session discards the stale connection pool.
+    """
+    global SESSION
+    SESSION.close()
+    SESSION = _new_session()
+
+
+def norm_name(name: str) -> str:
+    """Normalize a player name for joining across seasons.
+
+    The stats API is not consistent about accents or casing between
+    endpoints/seasons (e.g. "Luka Dončić" vs "Luka Doncic"), so fold
+    accents to ASCII and casefold before using names as join keys.
+    """
+    folded = unicodedata.normalize("NFKD", name)
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return sys.intern(folded.casefold())
+
+
+def fetch_nba_stats(season: str, expire_after=None) -> list[dict]:
     """Fetch player totals for a given season from NBA stats API."""
-    url = (
-        f"https://stats.nba.com/stats/leaguedashplayerstats"
-        f"?Season={season}&SeasonType=Regular+Season&PerMode=Totals&MeasureType=Base"
-    )
-    req = Request(url, headers=HEADERS)
-    try:
-        with urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode())
-    except (URLError, HTTPError) as e:
-        print(f"Error fetching {season}: {e}", file=sys.stderr)
+    url = "https://stats.nba.com/stats/leaguedashplayerstats"
+    params = {
+        "Season": season,
+        "SeasonType": "Regular Season",
+        "PerMode": "Totals",
+        "MeasureType": "Base",
+    }
+    data = None
+    resp = None
+    for attempt in range(2):
+        try:
+            resp = SESSION.get(url, params=params, timeout=30,
+                               expire_after=expire_after)
+            resp.raise_for_status()
+            data = json_loads(resp.content)
+            break
+        except requests.exceptions.Timeout:
+            # Retries already ran inside the adapter; reset the pool and
+            # try once more on a fresh connection.
+            clear_session()
+        except requests.RequestException as e:
+            print(f"Error fetching {season}: {e}", file=sys.stderr)
+            return []
+    # Rate limit courtesy — only pace calls that actually hit the network
+    if resp is not None and not getattr(resp, "from_cache", False):
+        time.sleep(1)
+    if data is None:
+        print(f"Error fetching {season}: timed out", file=sys.stderr)
         return []
 
-    rs = data["resultSets"][0]
-    headers = rs["headers"]
-    rows = rs["rowSet"]
-
-    name_i = headers.index("PLAYER_NAME")
-    gs_i = headers.index("GS")
-    min_i = headers.index("MIN")
-    gp_i = headers.index("GP")
+    # Fail fast with a clear message if the API schema drifts, rather
+    # than a bare KeyError/ValueError mid-parse
+    try:
+        rs = data["resultSets"][0]
+        headers = rs["headers"]
+        rows = rs["rowSet"]
+
+        name_i = headers.index("PLAYER_NAME")
+        gs_i = headers.index("GS")
+        min_i = headers.index("MIN")
+        gp_i = headers.index("GP")
+    except (KeyError, IndexError, ValueError) as e:
+        print(f"Unexpected leaguedashplayerstats schema for {season}: {e}",
+              file=sys.stderr)
+        return []
 
     players = []
     for r in rows:
         players.append({
-            "name": r[name_i],
+            # Interned so the season-join dict lookups compare by identity
+            "name": sys.intern(r[name_i]),
             "gp": int(r[gp_i]),
             "gs": int(r[gs_i]),
             "min": float(r[min_i]),
@@ -71,6 +155,17 @@ def evaluate_sc(curr: dict, prev: dict | None) -> dict:
     s4_gs = gs4 >= 41
     s4_min = min4 >= 2000
 
+    if s4_gs and s4_min:
+        # SC obviously met on season 4 alone; skip the averaging test
+        return {
+            "met": True,
+            "gs4": gs4,
+            "min4": round(min4),
+            "gs3": gs3,
+            "min3": round(min3),
+            "reason": f"S4 GS={gs4}≥41; S4 MIN={min4:.0f}≥2000",
+        }
+
     # Test 2: Average of seasons 3+4
     avg_gs = (gs3 + gs4) / 2 if prev else gs4
     avg_min = (min3 + min4) / 2 if prev else min4
@@ -112,23 +207,23 @@ def main():
     curr_stats = fetch_nba_stats(curr_season)
     print(f"  Got {len(curr_stats)} players")
 
-    time.sleep(1)  # Rate limit courtesy
-
     print(f"Fetching previous season: {prev_season}")
-    prev_stats = fetch_nba_stats(prev_season)
+    # Completed seasons never change; cache them forever
+    prev_stats = fetch_nba_stats(prev_season, expire_after=NEVER_EXPIRE)
     print(f"  Got {len(prev_stats)} players")
 
     if not curr_stats:
         print("No current season data, aborting.", file=sys.stderr)
         sys.exit(1)
 
-    # Build lookup by name
-    prev_by_name = {p["name"]: p for p in prev_stats}
+    # Build lookup by normalized name so accent/case drift between
+    # seasons doesn't silently drop the season-3 stats
+    prev_by_name = {norm_name(p["name"]): p for p in prev_stats}
 
     # Evaluate SC for all current players
     sc_data = {}
     for p in curr_stats:
-        prev = prev_by_name.get(p["name"])
+        prev = prev_by_name.get(norm_name(p["name"]))
         sc = evaluate_sc(p, prev)
         sc_data[p["name"]] = sc
 
@@ -140,8 +235,7 @@ def main():
         "players": sc_data,
     }
 
-    with open("sc_data.json", "w") as f:
-        json.dump(output, f, indent=2)
+    Path("sc_data.json").write_bytes(json_dump_bytes(output))
 
     # Summary
     met_count = sum(1 for v in sc_data.values() if v["met"])
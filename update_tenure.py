@@ -3,23 +3,48 @@
 update_tenure.py — Fetch date each player joined their current NBA team.
 
 FAST VERSION: Uses bulk leaguedashplayerstats (1 call per season) instead of
-per-player career stats (~600 calls). Total: ~20 API calls, runs in ~2 minutes.
+per-player career stats (~600 calls). Seasons are downloaded concurrently
+with aiohttp (capped by a semaphore to respect rate limits), so wall-clock
+is roughly one round-trip instead of 20+ serialized ones.
 
 Strategy:
   1. Fetch current season stats → all active players + their current team
-  2. Walk backwards season by season (bulk call each) to find when each
-     player first appeared on their current team continuously
+  2. Prefetch all lookback seasons concurrently, then walk backwards season
+     by season over the downloaded payloads to find when each player first
+     appeared on their current team continuously
   3. Output tenure_data.json
 
 """
 
-import json, time, requests, sys
+import asyncio, json, sys, time
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+
+import aiohttp
+
+try:  # orjson handles the multi-MB leaguedash payloads several times faster
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dump_bytes(obj):
+        """Serialize to pretty-printed UTF-8 bytes in one buffer."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    json_loads = json.loads
+
+    def json_dump_bytes(obj):
+        return json.dumps(obj, indent=2).encode()
 
 # --- CONFIG ---
 CURRENT_SEASON = '2025-26'
 MAX_LOOKBACK = 22  # LeBron's been in the league 23 seasons, cover edge cases
 OUTPUT = 'tenure_data.json'
+CONCURRENCY = 5  # simultaneous requests; stay well under NBA rate limits
+CACHE_DIR = Path('nba_cache')
+CACHE_TTL = 12 * 3600  # current-season payloads; historical seasons never expire
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -44,95 +69,198 @@ NBA_TEAMS = {
 }
 
 
+@lru_cache(maxsize=None)
 def season_str(start_year):
     """Convert start year to season string: 2025 → '2025-26'"""
     return f"{start_year}-{str(start_year + 1)[-2:]}"
 
 
+@lru_cache(maxsize=None)
 def prev_season(s):
     """'2025-26' → '2024-25'"""
     yr = int(s.split('-')[0])
     return season_str(yr - 1)
 
 
-def api_get(url, params):
-    """Make NBA stats API request with retry."""
-    for attempt in range(3):
-        try:
-            r = requests.get(url, headers=HEADERS, params=params, timeout=45)
-            if r.status_code == 200:
-                return r.json()
-            print(f"  HTTP {r.status_code}, retry {attempt+1}/3...")
-        except Exception as e:
-            print(f"  Error: {e}, retry {attempt+1}/3...")
-        time.sleep(3 * (attempt + 1))
-    return None
+@lru_cache(maxsize=None)
+def col_indices(headers_key, names):
+    """Map column names to row positions, cached per header layout.
+
+    The leaguedashplayerstats schema is identical across seasons, so the
+    ~23 payload parses share a single lookup. Fails fast with a clear
+    error if the API schema drifts, rather than a bare ValueError from
+    .index() deep in the row loop.
+    """
+    missing = [n for n in names if n not in headers_key]
+    if missing:
+        raise ValueError(
+            f"leaguedashplayerstats schema changed; missing columns: {missing}")
+    return tuple(headers_key.index(n) for n in names)
+
+
+def season_params(season):
+    return {
+        'Season': season,
+        'SeasonType': 'Regular Season',
+        'PerMode': 'Totals',
+        'MeasureType': 'Base',
+        'LeagueID': '00',
+    }
+
+
+@dataclass(slots=True)
+class PlayerRecord:
+    """Current-season entry for one player; slotted — one exists per player."""
+    name: str
+    team: str
+    team_id: int
+    gp: int
 
 
-def fetch_season_players(season):
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    acquire() returns immediately while tokens remain, so healthy periods
+    use the full request budget; once the bucket drains it sleeps just long
+    enough for the next token. Defaults to a conservative 20 req/min.
     """
-    Fetch all players for a season via leaguedashplayerstats.
+
+    def __init__(self, rate=20 / 60, burst=5):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self):
+        """Server pushed back (429/503): halve the rate and drain the bucket."""
+        self.rate = max(self.rate / 2, 1 / 60)
+        self.tokens = 0
+        self.last = time.monotonic()
+
+
+RATE_LIMIT = TokenBucket()
+
+
+def cache_load(season):
+    """Return the cached leaguedashplayerstats payload for a season, or None.
+
+    Historical seasons are immutable so their cache never expires; the
+    current season expires after CACHE_TTL.
+    """
+    path = CACHE_DIR / f'leaguedash_{season}.json'
+    if not path.exists():
+        return None
+    if season == CURRENT_SEASON and time.time() - path.stat().st_mtime > CACHE_TTL:
+        return None
+    return json_loads(path.read_bytes())
+
+
+def cache_store(season, data):
+    CACHE_DIR.mkdir(exist_ok=True)
+    with open(CACHE_DIR / f'leaguedash_{season}.json', 'w') as f:
+        json.dump(data, f)
+
+
+async def api_get(session, sem, url, params):
+    """Make NBA stats API request with retry + exponential backoff."""
+    async with sem:
+        for attempt in range(3):
+            await RATE_LIMIT.acquire()
+            try:
+                async with session.get(url, params=params,
+                                       timeout=aiohttp.ClientTimeout(total=45)) as r:
+                    if r.status == 200:
+                        return json_loads(await r.read())
+                    print(f"  HTTP {r.status}, retry {attempt+1}/3...")
+                    if r.status in (429, 503):
+                        RATE_LIMIT.throttle()
+                        retry_after = float(r.headers.get('Retry-After', 0) or 0)
+                        await asyncio.sleep(max(retry_after, 3 * (attempt + 1)))
+                        continue
+            except Exception as e:
+                print(f"  Error: {e}, retry {attempt+1}/3...")
+            await asyncio.sleep(3 * (attempt + 1))
+        return None
+
+
+def parse_season_players(data):
+    """
+    Parse a leaguedashplayerstats payload.
     Returns:
       - player_teams: dict player_id → set of team_ids they played for
       - player_names: dict player_id → name
-    
+
     Players traded mid-season appear once per team.
     """
-    print(f"  Fetching {season}...", end='', flush=True)
-    data = api_get(
-        'https://stats.nba.com/stats/leaguedashplayerstats',
-        params={
-            'Season': season,
-            'SeasonType': 'Regular Season',
-            'PerMode': 'Totals',
-            'MeasureType': 'Base',
-            'LeagueID': '00',
-        }
-    )
-    if not data:
-        print(" FAILED")
-        return None, None
-
     player_teams = {}
     player_names = {}
+    found = False
 
     for rs in data.get('resultSets', []):
         if rs['name'] != 'LeagueDashPlayerStats':
             continue
-        hdrs = rs['headers']
-        pid_i = hdrs.index('PLAYER_ID')
-        name_i = hdrs.index('PLAYER_NAME')
-        tid_i = hdrs.index('TEAM_ID')
+        found = True
+        pid_i, name_i, tid_i = col_indices(
+            tuple(rs['headers']), ('PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID'))
 
         for row in rs['rowSet']:
             pid = row[pid_i]
-            tid = row[tid_i]
-            name = row[name_i]
-            if pid not in player_teams:
-                player_teams[pid] = set()
-            player_teams[pid].add(tid)
-            player_names[pid] = name
-
-    print(f" → {len(player_teams)} players")
+            player_teams.setdefault(pid, set()).add(row[tid_i])
+            player_names[pid] = row[name_i]
+
+    if not found:
+        raise ValueError("payload has no LeagueDashPlayerStats resultSet")
     return player_teams, player_names
 
 
-def fetch_current_roster():
+async def fetch_season_payload(session, sem, season):
+    """Fetch the leaguedashplayerstats payload for a season, cache-first."""
+    data = cache_load(season)
+    if data is not None:
+        return data
+    data = await api_get(
+        session, sem,
+        'https://stats.nba.com/stats/leaguedashplayerstats',
+        params=season_params(season),
+    )
+    if data:
+        cache_store(season, data)
+    return data
+
+
+async def fetch_season_players_async(session, sem, season):
+    """
+    Fetch all players for a season via leaguedashplayerstats.
+    Returns (player_teams, player_names) as in parse_season_players,
+    or (None, None) on failure.
+    """
+    data = await fetch_season_payload(session, sem, season)
+    if not data:
+        print(f"  Fetching {season}... FAILED")
+        return None, None
+
+    player_teams, player_names = parse_season_players(data)
+    print(f"  Fetched {season} → {len(player_teams)} players")
+    return player_teams, player_names
+
+
+async def fetch_current_roster(session, sem):
     """
     Fetch current season player stats.
-    Returns dict: player_id → {name, team, team_id, gp}
+    Returns dict: player_id → PlayerRecord
     """
     print(f"Fetching current season ({CURRENT_SEASON})...")
-    data = api_get(
-        'https://stats.nba.com/stats/leaguedashplayerstats',
-        params={
-            'Season': CURRENT_SEASON,
-            'SeasonType': 'Regular Season',
-            'PerMode': 'Totals',
-            'MeasureType': 'Base',
-            'LeagueID': '00',
-        }
-    )
+    data = await fetch_season_payload(session, sem, CURRENT_SEASON)
     if not data:
         print("FATAL: Cannot fetch current season data")
         sys.exit(1)
@@ -141,74 +269,78 @@ def fetch_current_roster():
     for rs in data.get('resultSets', []):
         if rs['name'] != 'LeagueDashPlayerStats':
             continue
-        hdrs = rs['headers']
-        pid_i = hdrs.index('PLAYER_ID')
-        name_i = hdrs.index('PLAYER_NAME')
-        tid_i = hdrs.index('TEAM_ID')
-        abbr_i = hdrs.index('TEAM_ABBREVIATION')
-        gp_i = hdrs.index('GP')
+        pid_i, name_i, tid_i, abbr_i, gp_i = col_indices(
+            tuple(rs['headers']),
+            ('PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP'))
 
         for row in rs['rowSet']:
             pid = row[pid_i]
-            tid = row[tid_i]
-            name = row[name_i]
-            abbr = row[abbr_i]
             gp = row[gp_i]
 
             # If player appears multiple times (traded mid-season),
             # keep entry with more GP (= primary/current team)
-            if pid not in players or gp > players[pid]['gp']:
-                players[pid] = {
-                    'name': name,
-                    'team': abbr,
-                    'team_id': tid,
-                    'gp': gp,
-                }
+            if pid not in players or gp > players[pid].gp:
+                players[pid] = PlayerRecord(
+                    name=row[name_i],
+                    team=row[abbr_i],
+                    team_id=row[tid_i],
+                    gp=gp,
+                )
 
     return players
 
 
-def main():
+async def main():
     print("=" * 60)
     print("NBA Player Tenure Data Fetcher (Fast Bulk Version)")
     print("=" * 60)
 
-    # Step 1: Get current rosters
-    players = fetch_current_roster()
-    print(f"Found {len(players)} active players.\n")
+    sem = asyncio.Semaphore(CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit_per_host=8)
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        # Step 1: Get current rosters
+        players = await fetch_current_roster(session, sem)
+        print(f"Found {len(players)} active players.\n")
+
+        # Step 2a: Prefetch all lookback seasons concurrently
+        print("Fetching lookback seasons concurrently...")
+        past_seasons = []
+        season = CURRENT_SEASON
+        for i in range(MAX_LOOKBACK):
+            season = prev_season(season)
+            past_seasons.append(season)
+
+        results = await asyncio.gather(
+            *(fetch_season_players_async(session, sem, s) for s in past_seasons)
+        )
 
     # Initialize: everyone's tenure starts at current season
     tenure = {pid: CURRENT_SEASON for pid in players}
     # Unresolved = players we still need to check further back
     unresolved = set(players.keys())
 
-    # Step 2: Walk backwards season by season
-    print("Walking backwards through seasons...")
-    season = CURRENT_SEASON
+    # Step 2b: Walk backwards season by season over the downloaded payloads
+    print("\nWalking backwards through seasons...")
     seasons_checked = 0
 
-    for i in range(MAX_LOOKBACK):
+    for season, (past_teams, past_names) in zip(past_seasons, results):
         if not unresolved:
             print("  All players resolved!")
             break
 
-        season = prev_season(season)
         seasons_checked += 1
 
-        past_teams, past_names = fetch_season_players(season)
         if past_teams is None:
             print(f"  Could not fetch {season}, stopping lookback.")
             break
 
-        newly_resolved = set()
-
-        for pid in unresolved:
-            current_team_id = players[pid]['team_id']
+        # Players absent from this season weren't in the league → tenure
+        # starts next season; one C-level set difference instead of a
+        # dict-miss probe per player
+        newly_resolved = unresolved - past_teams.keys()
 
-            if pid not in past_teams:
-                # Player wasn't in the league → tenure starts next season
-                newly_resolved.add(pid)
-            elif current_team_id not in past_teams[pid]:
+        for pid in unresolved & past_teams.keys():
+            if players[pid].team_id not in past_teams[pid]:
                 # Player was on a DIFFERENT team → tenure starts next season
                 newly_resolved.add(pid)
             else:
@@ -219,12 +351,10 @@ def main():
         if newly_resolved:
             print(f"    Resolved {len(newly_resolved)} players, {len(unresolved)} remaining")
 
-        time.sleep(1.5)
-
     if unresolved:
         print(f"\n  {len(unresolved)} players with {MAX_LOOKBACK}+ year tenure:")
         for pid in unresolved:
-            print(f"    - {players[pid]['name']}")
+            print(f"    - {players[pid].name}")
 
     # Step 3: Build output
     print(f"\n{'='*60}")
@@ -237,43 +367,43 @@ def main():
         'players': {}
     }
 
+    # Decorate each entry with (team, -tenure, name) so the sorts below run
+    # on plain tuples via C-level itemgetter keys instead of Python lambdas
+    entries = []
+    current_yr = int(CURRENT_SEASON.split('-')[0])
     for pid, info in players.items():
         joined = tenure[pid]
         joined_yr = int(joined.split('-')[0])
-        current_yr = int(CURRENT_SEASON.split('-')[0])
         continuous = current_yr - joined_yr + 1
 
-        output['players'][info['name']] = {
-            'team': info['team'],
-            'team_id': info['team_id'],
+        entries.append((info.team, -continuous, info.name, {
+            'team': info.team,
+            'team_id': info.team_id,
             'player_id': pid,
             'joined_season': joined,
             'joined_date': f"{joined_yr}-10-01",
             'continuous_seasons': continuous,
             'joined_this_season': (joined == CURRENT_SEASON),
-        }
+        }))
 
     # Sort by team, then tenure (longest first)
-    output['players'] = dict(sorted(
-        output['players'].items(),
-        key=lambda x: (x[1]['team'], -x[1]['continuous_seasons'], x[0])
-    ))
+    entries.sort(key=itemgetter(0, 1, 2))
+    output['players'] = {name: rec for _, _, name, rec in entries}
 
-    with open(OUTPUT, 'w') as f:
-        json.dump(output, f, indent=2)
+    Path(OUTPUT).write_bytes(json_dump_bytes(output))
 
     print(f"Wrote {len(output['players'])} players to {OUTPUT}")
 
     # Summary
     print(f"\nTop 10 longest-tenured players:")
-    by_tenure = sorted(output['players'].items(), key=lambda x: -x[1]['continuous_seasons'])
-    for name, info in by_tenure[:10]:
+    by_tenure = sorted(entries, key=itemgetter(1))
+    for _, _, name, info in by_tenure[:10]:
         print(f"  {name} ({info['team']}) — since {info['joined_season']} ({info['continuous_seasons']} seasons)")
 
     print(f"\n{'='*60}")
-    print(f"Done! Total API calls: {seasons_checked + 1}")
+    print(f"Done! Total API calls: {MAX_LOOKBACK + 1}")
     print(f"{'='*60}")
 
 
 if __name__ == '__main__':
-    main()
+    asyncio.run(main())